@@ -312,7 +312,7 @@ async def update_flow_version(
     if version.status != FlowVersionStatus.DRAFT:
         raise HTTPException(
             status_code=status.HTTP_403_FORBIDDEN,
-            detail=f"Cannot edit {version.status.value} version. Only DRAFT versions can be modified.",
+            detail=f"Cannot edit {FlowVersionStatus(version.status).value} version. Only DRAFT versions can be modified.",
         )
 
     # Update the graph schema
@@ -366,7 +366,7 @@ async def publish_flow_version(
     if version.status != FlowVersionStatus.DRAFT:
         raise HTTPException(
             status_code=status.HTTP_400_BAD_REQUEST,
-            detail=f"Cannot publish {version.status.value} version. Only DRAFT versions can be published.",
+            detail=f"Cannot publish {FlowVersionStatus(version.status).value} version. Only DRAFT versions can be published.",
         )
 
     # Validate graph has required structure for publishing
@@ -1,6 +1,9 @@
 """Authentication service with bcrypt and JWT."""
 
+import time
 from datetime import UTC, datetime, timedelta
+from functools import lru_cache
+from typing import Any
 
 import bcrypt
 from jose import JWTError, jwt
@@ -46,22 +49,36 @@ def create_access_token(
     )
 
 
+@lru_cache(maxsize=1024)
+def _verify_access_token(token: str) -> dict[str, Any] | None:
+    """Verify signature and claims once per distinct token string."""
+    try:
+        return jwt.decode(
+            token,
+            settings.secret_key,
+            algorithms=[settings.jwt_algorithm],
+        )
+    except JWTError:
+        return None
+
+
 def decode_access_token(token: str) -> dict | None:
     """
     Decode and verify a JWT access token.
 
+    Signature verification is cached per token; expiry is re-checked on
+    every call so a cached token still stops working once it expires.
+
     Args:
         token: JWT token string
 
     Returns:
         Decoded payload dict, or None if invalid/expired
     """
-    try:
-        payload = jwt.decode(
-            token,
-            settings.secret_key,
-            algorithms=[settings.jwt_algorithm],
-        )
-        return payload
-    except JWTError:
+    payload = _verify_access_token(token)
+    if payload is None:
+        return None
+    exp = payload.get("exp")
+    if exp is not None and exp < time.time():
         return None
+    return dict(payload)
@@ -1,5 +1,7 @@
 """Characterization tests for authentication endpoint with snapshot validation."""
 
+from datetime import timedelta
+from types import SimpleNamespace
 from uuid import UUID
 
 import pytest
@@ -7,6 +9,8 @@ from httpx import AsyncClient
 from sqlalchemy.ext.asyncio import AsyncSession
 
 from app.models.user import User, UserRole
+from app.services import auth as auth_service
+from app.services.auth import create_access_token, decode_access_token
 
 
 @pytest.fixture
@@ -149,3 +153,20 @@ async def test_login_missing_email_returns_422(client: AsyncClient):
     )
 
     assert response.status_code == 422
+
+
+# --- Token Verification ---
+
+
+def test_cached_token_is_rejected_once_expired(monkeypatch: pytest.MonkeyPatch):
+    """A token verified (and cached) while valid must still expire on time."""
+    token = create_access_token(
+        data={"sub": "00000000-0000-0000-0000-000000000001"},
+        expires_delta=timedelta(minutes=1),
+    )
+    assert decode_access_token(token) is not None
+
+    later = auth_service.time.time() + 120
+    monkeypatch.setattr(auth_service, "time", SimpleNamespace(time=lambda: later))
+
+    assert decode_access_token(token) is None
@@ -1,45 +1,105 @@
 """Characterization tests for flow definition and version endpoints."""
 
+from datetime import UTC, datetime
+from uuid import UUID, uuid4
+
 import pytest
+import pytest_asyncio
 from httpx import AsyncClient
 from sqlalchemy.ext.asyncio import AsyncSession
-from uuid import UUID
 
 from app.models.flow import FlowDefinition, FlowVersion, FlowVersionStatus
-from app.models.user import User, UserRole
+from app.models.user import AuthUser, User, UserRole
+from app.services.auth import create_access_token
+
+# Publishing requires ADMIN or MANAGER; the seeded test user is an OPERATOR
+MANAGER_USER_ID = UUID("00000000-0000-0000-0000-000000000098")
+
+# Seed data built once at import; SQLAlchemy serializes graph_schema on flush
+# and no test mutates these in place.
+EMPTY_GRAPH_SCHEMA = {
+    "nodes": [],
+    "edges": [],
+    "viewport": {"x": 0, "y": 0, "zoom": 1},
+}
+# Tests never assert on the exact publish time
+PUBLISHED_AT = datetime(2024, 1, 1, tzinfo=UTC)
 
 
 # --- Helper Functions ---
 
 
-async def create_test_flow(db: AsyncSession, user_id: UUID) -> FlowDefinition:
-    """Create a test flow definition with initial draft version."""
+async def create_test_flow(
+    db: AsyncSession,
+    user_id: UUID,
+    status: FlowVersionStatus = FlowVersionStatus.DRAFT,
+) -> FlowDefinition:
+    """Create a test flow definition with an initial version 1 in the given status."""
     flow_def = FlowDefinition(
+        id=uuid4(),
         name={"hu": "Teszt Folyamat", "en": "Test Flow"},
         description="Test flow for unit tests",
         created_by=user_id,
     )
-    db.add(flow_def)
-    await db.flush()
-
     version = FlowVersion(
         flow_definition_id=flow_def.id,
         version_num=1,
-        status=FlowVersionStatus.DRAFT,
-        graph_schema={
-            "nodes": [],
-            "edges": [],
-            "viewport": {"x": 0, "y": 0, "zoom": 1},
-        },
+        status=status,
+        published_at=PUBLISHED_AT if status == FlowVersionStatus.PUBLISHED else None,
+        graph_schema=EMPTY_GRAPH_SCHEMA,
         created_by=user_id,
     )
-    db.add(version)
+    # IDs are pre-assigned, so both rows go out in a single flush
+    db.add_all([flow_def, version])
     await db.flush()
-    await db.refresh(flow_def)
 
     return flow_def
 
 
+@pytest_asyncio.fixture(scope="module")
+async def draft_flow(module_db_session: AsyncSession, module_operator_user: User) -> FlowDefinition:
+    """
+    Committed flow definition with a single DRAFT version 1.
+
+    Created once per module; tests that edit or fork it do so inside their
+    own SAVEPOINT, which is rolled back before the next test.
+    """
+    flow = await create_test_flow(module_db_session, module_operator_user.id)
+    await module_db_session.commit()
+    return flow
+
+
+@pytest_asyncio.fixture(scope="module")
+async def published_flow(
+    module_db_session: AsyncSession, module_operator_user: User
+) -> FlowDefinition:
+    """Committed flow definition whose only version (1) is PUBLISHED."""
+    flow = await create_test_flow(
+        module_db_session, module_operator_user.id, FlowVersionStatus.PUBLISHED
+    )
+    await module_db_session.commit()
+    return flow
+
+
+@pytest_asyncio.fixture
+async def manager_auth_headers(db_session: AsyncSession) -> dict[str, str]:
+    """Create a MANAGER user and return its Authorization header."""
+    db_session.add_all(
+        [
+            AuthUser(id=MANAGER_USER_ID, email="flow-manager@flowviz.test"),
+            User(
+                id=MANAGER_USER_ID,
+                email="flow-manager@flowviz.test",
+                full_name="Flow Manager",
+                role=UserRole.MANAGER,
+            ),
+        ]
+    )
+    await db_session.commit()
+    token = create_access_token(data={"sub": str(MANAGER_USER_ID), "role": UserRole.MANAGER.value})
+    return {"Authorization": f"Bearer {token}"}
+
+
 # --- Flow Definition Tests ---
 
 
@@ -75,14 +135,8 @@ async def test_create_flow_definition_response_shape(authenticated_client: Async
 
 
 @pytest.mark.asyncio
-async def test_list_flow_definitions(
-    authenticated_client: AsyncClient, db_session: AsyncSession, test_operator_user: User
-):
+async def test_list_flow_definitions(authenticated_client: AsyncClient, draft_flow: FlowDefinition):
     """List flow definitions returns items with version summary."""
-    # Create a flow first
-    await create_test_flow(db_session, test_operator_user.id)
-    await db_session.commit()
-
     response = await authenticated_client.get("/api/flows")
 
     assert response.status_code == 200
@@ -112,14 +166,9 @@ async def test_get_flow_definition_not_found(authenticated_client: AsyncClient):
 
 
 @pytest.mark.asyncio
-async def test_list_flow_versions(
-    authenticated_client: AsyncClient, db_session: AsyncSession, test_operator_user: User
-):
+async def test_list_flow_versions(authenticated_client: AsyncClient, draft_flow: FlowDefinition):
     """List versions returns all versions for a flow."""
-    flow = await create_test_flow(db_session, test_operator_user.id)
-    await db_session.commit()
-
-    response = await authenticated_client.get(f"/api/flows/{flow.id}/versions")
+    response = await authenticated_client.get(f"/api/flows/{draft_flow.id}/versions")
 
     assert response.status_code == 200
     data = response.json()
@@ -130,14 +179,9 @@ async def test_list_flow_versions(
 
 
 @pytest.mark.asyncio
-async def test_get_flow_version(
-    authenticated_client: AsyncClient, db_session: AsyncSession, test_operator_user: User
-):
+async def test_get_flow_version(authenticated_client: AsyncClient, draft_flow: FlowDefinition):
     """Get a specific version returns full graph schema."""
-    flow = await create_test_flow(db_session, test_operator_user.id)
-    await db_session.commit()
-
-    response = await authenticated_client.get(f"/api/flows/{flow.id}/versions/1")
+    response = await authenticated_client.get(f"/api/flows/{draft_flow.id}/versions/1")
 
     assert response.status_code == 200
     data = response.json()
@@ -149,25 +193,17 @@ async def test_get_flow_version(
 
 @pytest.mark.asyncio
 async def test_get_flow_version_not_found(
-    authenticated_client: AsyncClient, db_session: AsyncSession, test_operator_user: User
+    authenticated_client: AsyncClient, draft_flow: FlowDefinition
 ):
     """Getting a non-existent version returns 404."""
-    flow = await create_test_flow(db_session, test_operator_user.id)
-    await db_session.commit()
-
-    response = await authenticated_client.get(f"/api/flows/{flow.id}/versions/999")
+    response = await authenticated_client.get(f"/api/flows/{draft_flow.id}/versions/999")
 
     assert response.status_code == 404
 
 
 @pytest.mark.asyncio
-async def test_update_draft_version(
-    authenticated_client: AsyncClient, db_session: AsyncSession, test_operator_user: User
-):
+async def test_update_draft_version(authenticated_client: AsyncClient, draft_flow: FlowDefinition):
     """Updating a draft version saves the graph schema."""
-    flow = await create_test_flow(db_session, test_operator_user.id)
-    await db_session.commit()
-
     new_graph = {
         "nodes": [
             {
@@ -198,7 +234,7 @@ async def test_update_draft_version(
     }
 
     response = await authenticated_client.put(
-        f"/api/flows/{flow.id}/versions/1",
+        f"/api/flows/{draft_flow.id}/versions/1",
         json={"graph_schema": new_graph},
     )
 
@@ -210,31 +246,12 @@ async def test_update_draft_version(
 
 @pytest.mark.asyncio
 async def test_update_published_version_fails(
-    authenticated_client: AsyncClient, db_session: AsyncSession, test_operator_user: User
+    authenticated_client: AsyncClient, published_flow: FlowDefinition
 ):
     """Updating a published version returns 403."""
-    flow = await create_test_flow(db_session, test_operator_user.id)
-
-    # Manually publish the version
-    from sqlalchemy import select
-    from datetime import datetime, timezone
-
-    stmt = select(FlowVersion).where(FlowVersion.flow_definition_id == flow.id)
-    result = await db_session.execute(stmt)
-    version = result.scalar_one()
-    version.status = FlowVersionStatus.PUBLISHED
-    version.published_at = datetime.now(timezone.utc)
-    await db_session.commit()
-
     response = await authenticated_client.put(
-        f"/api/flows/{flow.id}/versions/1",
-        json={
-            "graph_schema": {
-                "nodes": [],
-                "edges": [],
-                "viewport": {"x": 0, "y": 0, "zoom": 1},
-            }
-        },
+        f"/api/flows/{published_flow.id}/versions/1",
+        json={"graph_schema": EMPTY_GRAPH_SCHEMA},
     )
 
     assert response.status_code == 403
@@ -246,12 +263,9 @@ async def test_update_published_version_fails(
 
 @pytest.mark.asyncio
 async def test_update_version_validates_edge_references(
-    authenticated_client: AsyncClient, db_session: AsyncSession, test_operator_user: User
+    authenticated_client: AsyncClient, draft_flow: FlowDefinition
 ):
     """Graph schema validation catches invalid edge references."""
-    flow = await create_test_flow(db_session, test_operator_user.id)
-    await db_session.commit()
-
     invalid_graph = {
         "nodes": [
             {
@@ -273,7 +287,7 @@ async def test_update_version_validates_edge_references(
     }
 
     response = await authenticated_client.put(
-        f"/api/flows/{flow.id}/versions/1",
+        f"/api/flows/{draft_flow.id}/versions/1",
         json={"graph_schema": invalid_graph},
     )
 
@@ -282,12 +296,9 @@ async def test_update_version_validates_edge_references(
 
 @pytest.mark.asyncio
 async def test_update_version_validates_parent_references(
-    authenticated_client: AsyncClient, db_session: AsyncSession, test_operator_user: User
+    authenticated_client: AsyncClient, draft_flow: FlowDefinition
 ):
     """Graph schema validation catches invalid parent references."""
-    flow = await create_test_flow(db_session, test_operator_user.id)
-    await db_session.commit()
-
     invalid_graph = {
         "nodes": [
             {
@@ -307,7 +318,7 @@ async def test_update_version_validates_parent_references(
     }
 
     response = await authenticated_client.put(
-        f"/api/flows/{flow.id}/versions/1",
+        f"/api/flows/{draft_flow.id}/versions/1",
         json={"graph_schema": invalid_graph},
     )
 
@@ -319,25 +330,10 @@ async def test_update_version_validates_parent_references(
 
 
 @pytest.mark.asyncio
-async def test_fork_version(
-    authenticated_client: AsyncClient, db_session: AsyncSession, test_operator_user: User
-):
+async def test_fork_version(authenticated_client: AsyncClient, published_flow: FlowDefinition):
     """Forking a version creates a new draft."""
-    flow = await create_test_flow(db_session, test_operator_user.id)
-
-    # Publish the first version manually
-    from sqlalchemy import select
-    from datetime import datetime, timezone
-
-    stmt = select(FlowVersion).where(FlowVersion.flow_definition_id == flow.id)
-    result = await db_session.execute(stmt)
-    version = result.scalar_one()
-    version.status = FlowVersionStatus.PUBLISHED
-    version.published_at = datetime.now(timezone.utc)
-    await db_session.commit()
-
     # Fork from published version
-    response = await authenticated_client.post(f"/api/flows/{flow.id}/versions/1/fork")
+    response = await authenticated_client.post(f"/api/flows/{published_flow.id}/versions/1/fork")
 
     assert response.status_code == 200
     data = response.json()
@@ -347,38 +343,43 @@ async def test_fork_version(
 
 @pytest.mark.asyncio
 async def test_fork_fails_if_draft_exists(
-    authenticated_client: AsyncClient, db_session: AsyncSession, test_operator_user: User
+    authenticated_client: AsyncClient, draft_flow: FlowDefinition
 ):
     """Forking fails if a draft already exists."""
-    flow = await create_test_flow(db_session, test_operator_user.id)
-    await db_session.commit()
-
     # Try to fork when draft already exists
-    response = await authenticated_client.post(f"/api/flows/{flow.id}/versions/1/fork")
+    response = await authenticated_client.post(f"/api/flows/{draft_flow.id}/versions/1/fork")
 
     assert response.status_code == 409
     assert "draft" in response.json()["detail"].lower()
 
 
-# --- RBAC Tests ---
-
-
 @pytest.mark.asyncio
-async def test_create_flow_requires_authentication(client: AsyncClient):
-    """Creating a flow without auth returns 401."""
+async def test_publish_published_version_fails(
+    client: AsyncClient, published_flow: FlowDefinition, manager_auth_headers: dict[str, str]
+):
+    """Publishing a version that is already published returns 400."""
     response = await client.post(
-        "/api/flows",
-        json={
-            "name": {"hu": "Teszt", "en": "Test"},
-        },
+        f"/api/flows/{published_flow.id}/versions/1/publish", headers=manager_auth_headers
     )
 
-    assert response.status_code == 401
+    assert response.status_code == 400
+    assert "PUBLISHED" in response.json()["detail"]
+
+
+# --- RBAC Tests ---
 
 
 @pytest.mark.asyncio
-async def test_list_flows_requires_authentication(client: AsyncClient):
-    """Listing flows without auth returns 401."""
-    response = await client.get("/api/flows")
+@pytest.mark.parametrize(
+    ("method", "body"),
+    [
+        ("POST", {"name": {"hu": "Teszt", "en": "Test"}}),
+        ("GET", None),
+    ],
+    ids=["create_flow", "list_flows"],
+)
+async def test_flows_require_authentication(client: AsyncClient, method: str, body: dict | None):
+    """Creating or listing flows without auth returns 401."""
+    response = await client.request(method, "/api/flows", json=body)
 
     assert response.status_code == 401
@@ -6,6 +6,11 @@ from httpx import AsyncClient
 # Test UUID for lot_id (required field)
 TEST_LOT_ID = "00000000-0000-0000-0000-000000000001"
 
+# Base request bodies built once; tests overlay per-case fields with `|`
+PASS_PAYLOAD = {"lot_id": TEST_LOT_ID, "decision": "PASS"}
+HOLD_PAYLOAD = {"lot_id": TEST_LOT_ID, "decision": "HOLD"}
+FAIL_PAYLOAD = {"lot_id": TEST_LOT_ID, "decision": "FAIL"}
+
 # --- Success Tests ---
 
 
@@ -14,11 +19,7 @@ async def test_create_qc_decision_returns_201(authenticated_client: AsyncClient)
     """Creating a QC decision should return 201 Created."""
     response = await authenticated_client.post(
         "/api/qc-decisions",
-        json={
-            "lot_id": TEST_LOT_ID,
-            "decision": "PASS",
-            "temperature_c": 4.5,
-        },
+        json=PASS_PAYLOAD | {"temperature_c": 4.5},
     )
 
     assert response.status_code == 201
@@ -33,9 +34,8 @@ async def test_create_qc_decision_response_shape(authenticated_client: AsyncClie
     """
     response = await authenticated_client.post(
         "/api/qc-decisions",
-        json={
-            "lot_id": TEST_LOT_ID,
-            "decision": "PASS",
+        json=PASS_PAYLOAD
+        | {
             "notes": "All checks passed",
             "temperature_c": 3.8,
         },
@@ -71,9 +71,8 @@ async def test_create_qc_decision_success_snapshot(authenticated_client: AsyncCl
     """
     response = await authenticated_client.post(
         "/api/qc-decisions",
-        json={
-            "lot_id": TEST_LOT_ID,
-            "decision": "PASS",
+        json=PASS_PAYLOAD
+        | {
             "notes": "Snapshot test notes",
             "temperature_c": 4.0,
         },
@@ -96,10 +95,7 @@ async def test_hold_decision_without_notes_returns_422(authenticated_client: Asy
     """HOLD decision without notes must return 422."""
     response = await authenticated_client.post(
         "/api/qc-decisions",
-        json={
-            "lot_id": TEST_LOT_ID,
-            "decision": "HOLD",
-        },
+        json=HOLD_PAYLOAD,
     )
     assert response.status_code == 422
 
@@ -109,11 +105,7 @@ async def test_hold_decision_with_short_notes_returns_422(authenticated_client:
     """HOLD decision with notes < 10 chars must return 422."""
     response = await authenticated_client.post(
         "/api/qc-decisions",
-        json={
-            "lot_id": TEST_LOT_ID,
-            "decision": "HOLD",
-            "notes": "short",
-        },
+        json=HOLD_PAYLOAD | {"notes": "short"},
     )
     assert response.status_code == 422
 
@@ -123,11 +115,7 @@ async def test_hold_decision_with_exactly_10_chars_succeeds(authenticated_client
     """HOLD decision with exactly 10 character notes should succeed."""
     response = await authenticated_client.post(
         "/api/qc-decisions",
-        json={
-            "lot_id": TEST_LOT_ID,
-            "decision": "HOLD",
-            "notes": "1234567890",  # Exactly 10 chars
-        },
+        json=HOLD_PAYLOAD | {"notes": "1234567890"},  # Exactly 10 chars
     )
     assert response.status_code == 201
 
@@ -137,11 +125,7 @@ async def test_hold_decision_with_valid_notes_succeeds(authenticated_client: Asy
     """HOLD decision with proper notes (>=10 chars) should succeed."""
     response = await authenticated_client.post(
         "/api/qc-decisions",
-        json={
-            "lot_id": TEST_LOT_ID,
-            "decision": "HOLD",
-            "notes": "Temperature out of range, holding for review",
-        },
+        json=HOLD_PAYLOAD | {"notes": "Temperature out of range, holding for review"},
     )
     assert response.status_code == 201
 
@@ -154,10 +138,7 @@ async def test_fail_decision_without_notes_returns_422(authenticated_client: Asy
     """FAIL decision without notes must return 422."""
     response = await authenticated_client.post(
         "/api/qc-decisions",
-        json={
-            "lot_id": TEST_LOT_ID,
-            "decision": "FAIL",
-        },
+        json=FAIL_PAYLOAD,
     )
     assert response.status_code == 422
 
@@ -167,11 +148,7 @@ async def test_fail_decision_with_short_notes_returns_422(authenticated_client:
     """FAIL decision with notes < 10 chars must return 422."""
     response = await authenticated_client.post(
         "/api/qc-decisions",
-        json={
-            "lot_id": TEST_LOT_ID,
-            "decision": "FAIL",
-            "notes": "short",
-        },
+        json=FAIL_PAYLOAD | {"notes": "short"},
     )
     assert response.status_code == 422
 
@@ -181,11 +158,7 @@ async def test_fail_decision_with_valid_notes_succeeds(authenticated_client: Asy
     """FAIL decision with proper notes (>=10 chars) should succeed."""
     response = await authenticated_client.post(
         "/api/qc-decisions",
-        json={
-            "lot_id": TEST_LOT_ID,
-            "decision": "FAIL",
-            "notes": "Contamination detected, batch rejected",
-        },
+        json=FAIL_PAYLOAD | {"notes": "Contamination detected, batch rejected"},
     )
     assert response.status_code == 201
 
@@ -238,10 +211,7 @@ async def test_pass_decision_without_notes_succeeds(authenticated_client: AsyncC
     """PASS decision does NOT require notes."""
     response = await authenticated_client.post(
         "/api/qc-decisions",
-        json={
-            "lot_id": TEST_LOT_ID,
-            "decision": "PASS",
-        },
+        json=PASS_PAYLOAD,
     )
     assert response.status_code == 201
 
@@ -251,11 +221,7 @@ async def test_pass_decision_with_optional_notes_succeeds(authenticated_client:
     """PASS decision can optionally include notes."""
     response = await authenticated_client.post(
         "/api/qc-decisions",
-        json={
-            "lot_id": TEST_LOT_ID,
-            "decision": "PASS",
-            "notes": "No issues found",
-        },
+        json=PASS_PAYLOAD | {"notes": "No issues found"},
     )
     assert response.status_code == 201
 
@@ -319,9 +285,8 @@ async def test_qc_decision_with_all_optional_fields(authenticated_client: AsyncC
     """QC decision can include all optional fields."""
     response = await authenticated_client.post(
         "/api/qc-decisions",
-        json={
-            "lot_id": TEST_LOT_ID,
-            "decision": "PASS",
+        json=PASS_PAYLOAD
+        | {
             "notes": "Comprehensive check completed",
             "temperature_c": 4.2,
             "digital_signature": "sig_123abc",
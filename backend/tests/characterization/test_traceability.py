@@ -42,9 +42,6 @@ async def test_lots(db_session: AsyncSession) -> dict[str, Lot]:
         weight_kg=530.0,
     )
 
-    db_session.add_all([raw_beef, raw_spice, mix_batch, fg_doner])
-    await db_session.flush()
-
     # Create genealogy links
     # RAW -> MIX
     link1 = LotGenealogy(
@@ -64,7 +61,10 @@ async def test_lots(db_session: AsyncSession) -> dict[str, Lot]:
         quantity_used_kg=530.0,
     )
 
-    db_session.add_all([link1, link2, link3])
+    # Lot IDs are pre-assigned, so lots and links share one flush.
+    # Function-scoped on purpose: the endpoint must read these objects from the
+    # test's own session, which the golden snapshot's weight formatting relies on.
+    db_session.add_all([raw_beef, raw_spice, mix_batch, fg_doner, link1, link2, link3])
     await db_session.commit()
 
     return {
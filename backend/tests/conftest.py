@@ -1,14 +1,19 @@
 """Pytest fixtures and configuration."""
 
-import asyncio
+import json
 import os
-from collections.abc import AsyncGenerator, Generator
+from collections.abc import AsyncGenerator, Awaitable, Callable
+from contextvars import ContextVar
+from typing import Any, NamedTuple
+from urllib.parse import urlsplit
 from uuid import UUID
 
 import pytest
 import pytest_asyncio
-from httpx import ASGITransport, AsyncClient
-from sqlalchemy.ext.asyncio import AsyncSession, async_sessionmaker, create_async_engine
+from httpx import ASGITransport, AsyncClient, Headers
+from sqlalchemy import event, insert
+from sqlalchemy.ext.asyncio import AsyncConnection, AsyncSession, create_async_engine
+from sqlalchemy.pool import StaticPool
 
 os.environ.setdefault("SQLITE_TESTS", "1")
 
@@ -23,24 +28,47 @@ from app.services.auth import create_access_token
 # consider using a PostgreSQL test database or testcontainers-python.
 TEST_DATABASE_URL = "sqlite+aiosqlite:///:memory:"
 
+# Session the app's get_db resolves to, set per test by `db_session`.
+# The override is installed once here instead of per client fixture.
+_current_db_session: ContextVar[AsyncSession] = ContextVar("current_db_session")
 
-@pytest.fixture(scope="session")
-def event_loop() -> Generator[asyncio.AbstractEventLoop]:
-    """Create event loop for async tests."""
-    loop = asyncio.get_event_loop_policy().new_event_loop()
-    yield loop
-    loop.close()
 
+async def _override_get_db() -> AsyncGenerator[AsyncSession]:
+    yield _current_db_session.get()
 
-@pytest_asyncio.fixture(scope="function")
+
+app.dependency_overrides[get_db] = _override_get_db
+
+
+def pytest_collection_modifyitems(items: list[pytest.Item]) -> None:
+    """Run every async test on the session event loop shared with the engine."""
+    session_loop = pytest.mark.asyncio(loop_scope="session")
+    for item in items:
+        if pytest_asyncio.is_async_test(item):
+            item.add_marker(session_loop, append=False)
+
+
+@pytest_asyncio.fixture(scope="session")
 async def db_engine():
-    """Create test database engine."""
+    """Create the test database engine and schema once per session."""
+    # StaticPool, not NullPool: every connection to ":memory:" is a fresh empty
+    # database, so the whole session must share the one connection.
     engine = create_async_engine(
         TEST_DATABASE_URL,
         echo=False,
+        poolclass=StaticPool,
         execution_options={"schema_translate_map": {"auth": None}},
     )
 
+    # pysqlite defers BEGIN on its own, which breaks SAVEPOINT; emit it ourselves
+    @event.listens_for(engine.sync_engine, "connect")
+    def _disable_pysqlite_begin(dbapi_connection, _connection_record) -> None:
+        dbapi_connection.isolation_level = None
+
+    @event.listens_for(engine.sync_engine, "begin")
+    def _emit_begin(conn) -> None:
+        conn.exec_driver_sql("BEGIN")
+
     async with engine.begin() as conn:
         await conn.run_sync(Base.metadata.create_all)
 
@@ -52,38 +80,140 @@ async def db_engine():
     await engine.dispose()
 
 
-@pytest_asyncio.fixture(scope="function")
-async def db_session(db_engine) -> AsyncGenerator[AsyncSession]:
-    """Create test database session."""
-    async_session = async_sessionmaker(
-        db_engine,
-        class_=AsyncSession,
-        expire_on_commit=False,
-    )
+@pytest_asyncio.fixture(scope="module")
+async def _db_connection(db_engine, _seed_users: None) -> AsyncGenerator[AsyncConnection]:
+    """
+    Open one connection per test module inside a transaction that is never committed.
 
-    async with async_session() as session:
+    Session-wide seed data is written before the first module connection opens,
+    since the in-memory database has a single underlying connection.
+    """
+    async with db_engine.connect() as conn:
+        outer = await conn.begin()
+        yield conn
+        await outer.rollback()
+
+
+@pytest_asyncio.fixture(scope="module")
+async def module_db_session(_db_connection: AsyncConnection) -> AsyncGenerator[AsyncSession]:
+    """
+    Create a session for module-scoped fixture data.
+
+    Rows committed here are visible to every test in the module and are
+    discarded with the module transaction.
+    """
+    async with AsyncSession(
+        bind=_db_connection,
+        expire_on_commit=False,
+        join_transaction_mode="create_savepoint",
+    ) as session:
         yield session
 
 
 @pytest_asyncio.fixture(scope="function")
-async def client(db_session: AsyncSession) -> AsyncGenerator[AsyncClient]:
+async def db_session(_db_connection: AsyncConnection) -> AsyncGenerator[AsyncSession]:
     """
-    Create test HTTP client with database override.
+    Create test database session rolled back after each test.
 
-    This is an UNAUTHENTICATED client. Use `authenticated_client` for
-    endpoints that require authentication.
+    Each test runs inside its own SAVEPOINT on the module connection, so
+    `commit()` calls from tests or route handlers only release nested SAVEPOINTs.
+    Requests made through the app during the test use this same session.
     """
+    test_savepoint = await _db_connection.begin_nested()
+    async with AsyncSession(
+        bind=_db_connection,
+        expire_on_commit=False,
+        join_transaction_mode="create_savepoint",
+    ) as session:
+        token = _current_db_session.set(session)
+        yield session
+        _current_db_session.reset(token)
+    await test_savepoint.rollback()
 
-    async def override_get_db() -> AsyncGenerator[AsyncSession]:
-        yield db_session
-
-    app.dependency_overrides[get_db] = override_get_db
 
-    transport = ASGITransport(app=app)
-    async with AsyncClient(transport=transport, base_url="http://test") as ac:
+@pytest_asyncio.fixture(scope="session")
+async def _http_client() -> AsyncGenerator[AsyncClient]:
+    """Unauthenticated HTTP client over the ASGI app, built once per session."""
+    async with AsyncClient(transport=ASGITransport(app=app), base_url="http://test") as ac:
         yield ac
 
-    app.dependency_overrides.clear()
+
+@pytest.fixture(scope="function")
+def client(db_session: AsyncSession, _http_client: AsyncClient) -> AsyncClient:
+    """
+    Create test HTTP client bound to the test's `db_session`.
+
+    This is an UNAUTHENTICATED client. Use `authenticated_client` for
+    endpoints that require authentication.
+    """
+    return _http_client
+
+
+class ASGIResponse(NamedTuple):
+    """Minimal response collected from a direct ASGI call."""
+
+    status_code: int
+    headers: Headers
+    body: bytes
+
+    def json(self) -> Any:
+        return json.loads(self.body)
+
+
+async def _asgi_call(
+    method: str,
+    path: str,
+    json_body: Any = None,
+    headers: dict[str, str] | None = None,
+) -> ASGIResponse:
+    """Invoke the ASGI app directly, skipping httpx request/response building."""
+    url = urlsplit(path)
+    body = b"" if json_body is None else json.dumps(json_body).encode()
+    raw_headers = [(b"host", b"test")]
+    if json_body is not None:
+        raw_headers.append((b"content-type", b"application/json"))
+    raw_headers.extend((k.lower().encode(), v.encode()) for k, v in (headers or {}).items())
+    scope = {
+        "type": "http",
+        "asgi": {"version": "3.0"},
+        "http_version": "1.1",
+        "method": method,
+        "scheme": "http",
+        "path": url.path,
+        "raw_path": url.path.encode(),
+        "root_path": "",
+        "query_string": url.query.encode(),
+        "headers": raw_headers,
+        "client": ("127.0.0.1", 123),
+        "server": ("test", 80),
+    }
+    messages = [{"type": "http.request", "body": body, "more_body": False}]
+
+    async def receive() -> dict[str, Any]:
+        return messages.pop() if messages else {"type": "http.disconnect"}
+
+    start: dict[str, Any] = {}
+    chunks: list[bytes] = []
+
+    async def send(message: dict[str, Any]) -> None:
+        if message["type"] == "http.response.start":
+            start.update(message)
+        elif message["type"] == "http.response.body":
+            chunks.append(message.get("body", b""))
+
+    await app(scope, receive, send)
+    return ASGIResponse(start["status"], Headers(start.get("headers", [])), b"".join(chunks))
+
+
+@pytest.fixture(scope="function")
+def asgi_call(db_session: AsyncSession) -> Callable[..., Awaitable[ASGIResponse]]:
+    """
+    Direct ASGI caller bound to the test's `db_session`, for hot-loop tests.
+
+    Roughly 5x cheaper per request than `client`; keep `client` for
+    characterization suites that exercise the full HTTP stack.
+    """
+    return _asgi_call
 
 
 # --- Authenticated Test Fixtures ---
@@ -92,28 +222,73 @@ async def client(db_session: AsyncSession) -> AsyncGenerator[AsyncClient]:
 TEST_OPERATOR_USER_ID = UUID("00000000-0000-0000-0000-000000000099")
 
 
+# Rows bulk-inserted by `_seed_users` (one INSERT per table for all rows).
+# Keys must match the AuthUser / User column names exactly.
+SEEDED_AUTH_USERS = [
+    {"id": TEST_OPERATOR_USER_ID, "email": "test-operator@flowviz.test"},
+]
+SEEDED_USERS = [
+    {
+        "id": TEST_OPERATOR_USER_ID,
+        "email": "test-operator@flowviz.test",
+        "full_name": "Test Operator",
+        "role": UserRole.OPERATOR,
+    },
+]
+
+
+@pytest_asyncio.fixture(scope="session")
+async def _seed_users(db_engine) -> None:
+    """Insert the seeded auth_users and users rows in two statements."""
+    async with db_engine.begin() as conn:
+        await conn.execute(insert(AuthUser), SEEDED_AUTH_USERS)
+        await conn.execute(insert(User), SEEDED_USERS)
+
+
 @pytest_asyncio.fixture(scope="function")
-async def test_operator_user(db_session: AsyncSession) -> User:
-    """Create an OPERATOR test user for characterization tests."""
-    auth_user = AuthUser(id=TEST_OPERATOR_USER_ID, email="test-operator@flowviz.test")
-    db_session.add(auth_user)
-    await db_session.flush()
-
-    user = User(
-        id=TEST_OPERATOR_USER_ID,
-        email="test-operator@flowviz.test",
-        full_name="Test Operator",
-        role=UserRole.OPERATOR,
-    )
-    db_session.add(user)
-    await db_session.commit()
+async def test_operator_user(db_session: AsyncSession, _seed_users: None) -> User:
+    """Return the seeded OPERATOR test user for characterization tests."""
+    user = await db_session.get(User, TEST_OPERATOR_USER_ID)
+    assert user is not None
     return user
 
 
-@pytest_asyncio.fixture(scope="function")
-async def authenticated_client(
-    db_session: AsyncSession, test_operator_user: User
+@pytest_asyncio.fixture(scope="module")
+async def module_operator_user(module_db_session: AsyncSession) -> User:
+    """Return the seeded OPERATOR test user for module-scoped fixtures."""
+    user = await module_db_session.get(User, TEST_OPERATOR_USER_ID)
+    assert user is not None
+    return user
+
+
+@pytest.fixture(scope="session")
+def operator_auth_headers() -> dict[str, str]:
+    """Authorization header for the seeded OPERATOR user, signed once per session."""
+    token = create_access_token(
+        data={"sub": str(TEST_OPERATOR_USER_ID), "role": UserRole.OPERATOR.value}
+    )
+    return {"Authorization": f"Bearer {token}"}
+
+
+@pytest_asyncio.fixture(scope="session")
+async def _authenticated_http_client(
+    operator_auth_headers: dict[str, str],
 ) -> AsyncGenerator[AsyncClient]:
+    """OPERATOR-authenticated HTTP client over the ASGI app, built once per session."""
+    async with AsyncClient(
+        transport=ASGITransport(app=app),
+        base_url="http://test",
+        headers=operator_auth_headers,
+    ) as ac:
+        yield ac
+
+
+@pytest.fixture(scope="function")
+def authenticated_client(
+    db_session: AsyncSession,
+    test_operator_user: User,
+    _authenticated_http_client: AsyncClient,
+) -> AsyncClient:
     """
     Create test HTTP client with OPERATOR authentication.
 
@@ -125,23 +300,4 @@ async def authenticated_client(
 
     Use this fixture for characterization tests that need authentication.
     """
-
-    async def override_get_db() -> AsyncGenerator[AsyncSession]:
-        yield db_session
-
-    app.dependency_overrides[get_db] = override_get_db
-
-    # Create JWT token for the test user
-    token = create_access_token(
-        data={"sub": str(test_operator_user.id), "role": test_operator_user.role.value}
-    )
-
-    transport = ASGITransport(app=app)
-    async with AsyncClient(
-        transport=transport,
-        base_url="http://test",
-        headers={"Authorization": f"Bearer {token}"},
-    ) as ac:
-        yield ac
-
-    app.dependency_overrides.clear()
+    return _authenticated_http_client
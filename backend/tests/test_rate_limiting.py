@@ -5,30 +5,26 @@ In tests using SQLite and in-memory limiter storage, the actual rate
 limits may not trigger as expected since each test starts fresh.
 
 For full rate limiting validation, run integration tests against
-a persistent Redis/Valkey backend.
+a persistent Redis/Valkey backend. When a limit is exceeded, SlowAPI's
+handler responds 429 with {"error": "Rate limit exceeded: <limit details>"}.
 """
 
-import pytest
-from httpx import AsyncClient
-
+import asyncio
 
-@pytest.mark.asyncio
-async def test_health_endpoint_responds(client: AsyncClient):
-    """Health endpoint should respond with rate limit headers when configured."""
-    response = await client.get("/api/health")
+import pytest
+from limits import parse
 
-    assert response.status_code == 200
-    # Rate limit headers should be present when SlowAPI is configured
-    # These headers indicate rate limiting is active
-    # X-RateLimit-Limit, X-RateLimit-Remaining, X-RateLimit-Reset
+from app.main import app
+from app.rate_limit import limiter
 
 
 @pytest.mark.asyncio
-async def test_login_endpoint_responds_with_invalid_credentials(client: AsyncClient):
+async def test_login_endpoint_responds_with_invalid_credentials(asgi_call):
     """Login endpoint should respond (testing rate limit is configured)."""
-    response = await client.post(
+    response = await asgi_call(
+        "POST",
         "/api/login",
-        json={"email": "nonexistent@test.com"},
+        json_body={"email": "nonexistent@test.com"},
     )
 
     # 401 for invalid credentials OR 429 if rate limited from previous tests
@@ -37,53 +33,22 @@ async def test_login_endpoint_responds_with_invalid_credentials(client: AsyncCli
 
 
 @pytest.mark.asyncio
-async def test_multiple_health_requests_succeed(client: AsyncClient):
+async def test_multiple_health_requests_succeed(asgi_call):
     """Multiple health requests should succeed (under rate limit)."""
-    # Make 10 requests - well under the 200/minute limit
-    for _ in range(10):
-        response = await client.get("/api/health")
-        assert response.status_code == 200
-
-
-@pytest.mark.asyncio
-async def test_rate_limit_429_response_format(client: AsyncClient):
-    """
-    Verify 429 response format when rate limit is exceeded.
+    # Make 10 concurrent requests - well under the 200/minute limit
+    responses = await asyncio.gather(*(asgi_call("GET", "/api/health") for _ in range(10)))
+    assert all(response.status_code == 200 for response in responses)
 
-    NOTE: This test may be skipped if running with in-memory storage
-    that resets between requests. It's mainly for documentation of
-    expected behavior.
-    """
-    # This is a configuration verification test.
-    # The actual rate limiting behavior depends on the backend storage.
-    # In production with Redis/Valkey, this would trigger after exceeding limits.
 
-    # Make a single request to verify the endpoint is configured
-    response = await client.get("/api/health")
-    assert response.status_code == 200
-
-    # When rate limited, response should be:
-    # - Status: 429 Too Many Requests
-    # - Headers: Retry-After
-    # - Body: {"detail": "Rate limit exceeded: ..."}
-
-
-@pytest.mark.asyncio
-async def test_rate_limiter_is_configured_on_app(client: AsyncClient):
+def test_rate_limiter_is_configured_on_app():
     """Verify the rate limiter is properly attached to the app."""
-    # Access the app through the client's transport
-    from app.main import app
-
-    # Check that limiter is attached to app state
-    assert hasattr(app.state, "limiter")
-    assert app.state.limiter is not None
+    # Starlette's State raises AttributeError if the limiter was never attached
+    assert app.state.limiter is limiter
 
 
 @pytest.mark.asyncio
 async def test_login_rate_limit_configuration():
     """Verify login endpoint has correct rate limit configured."""
-    from app.rate_limit import limiter
-
     # The login endpoint should have a 10/minute limit
     # This is a configuration verification, not a runtime test
     # The actual decorator is applied at import time
@@ -92,39 +57,27 @@ async def test_login_rate_limit_configuration():
     assert len(limiter._default_limits) > 0
 
 
-# --- Documentation Tests ---
-# These tests document the expected rate limiting behavior
-
-
-class TestRateLimitingDocumentation:
-    """Documentation tests for rate limiting configuration."""
-
-    def test_endpoint_rate_limits_documented(self):
-        """Document the rate limits for each endpoint."""
-        expected_limits = {
-            "/api/health": "200/minute",
-            "/api/login": "10/minute",
-            "/api/lots (GET)": "200/minute",
-            "/api/lots (POST)": "100/minute",
-            "/api/qc-decisions": "100/minute",
-            "/api/traceability/{lot_code}": "50/minute",
-        }
-
-        # This test serves as documentation
-        assert len(expected_limits) == 6
-
-    def test_rate_limit_exceeded_response_documented(self):
-        """Document the expected 429 response format."""
-        expected_response = {
-            "status_code": 429,
-            "headers": {
-                "Retry-After": "<seconds until limit resets>",
-                "X-RateLimit-Limit": "<configured limit>",
-                "X-RateLimit-Remaining": "0",
-                "X-RateLimit-Reset": "<timestamp when limit resets>",
-            },
-            "body": {"detail": "Rate limit exceeded: <limit details>"},
-        }
-
-        # This test serves as documentation
-        assert expected_response["status_code"] == 429
+# --- Per-Endpoint Limits ---
+# Documented limits, keyed by the "<module>.<handler>" name SlowAPI registers
+
+EXPECTED_ROUTE_LIMITS = {
+    "app.api.routes.health.health_check": "200/minute",
+    "app.api.routes.auth.login": "10/minute",
+    "app.api.routes.lots.list_lots": "200/minute",
+    "app.api.routes.lots.create_lot": "100/minute",
+    "app.api.routes.qc.create_qc_decision": "100/minute",
+    "app.api.routes.traceability.get_traceability": "50/minute",
+}
+
+
+@pytest.mark.parametrize(
+    ("route", "expected_limit"),
+    EXPECTED_ROUTE_LIMITS.items(),
+    ids=EXPECTED_ROUTE_LIMITS.keys(),
+)
+def test_endpoint_rate_limit_matches_documented(route: str, expected_limit: str):
+    """Each endpoint should register exactly its documented rate limit."""
+    # _route_limits is SlowAPI's private registry of @limiter.limit decorators
+    # (slowapi 0.1.x); if an upgrade renames it, this lookup is what breaks.
+    registered = [route_limit.limit for route_limit in limiter._route_limits[route]]
+    assert registered == [parse(expected_limit)]
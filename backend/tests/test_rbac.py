@@ -6,168 +6,115 @@ Tests verify that:
 3. Authorized roles can access their permitted endpoints
 """
 
+from typing import get_args
 from uuid import UUID
 
 import pytest
 import pytest_asyncio
+from fastapi import HTTPException
 from httpx import AsyncClient
+from sqlalchemy import insert
 from sqlalchemy.ext.asyncio import AsyncSession
 
+from app.api.deps import CanCreateLots
 from app.models.user import AuthUser, User, UserRole
 from app.services.auth import create_access_token
 
-
-def create_test_token(user_id: str, role: UserRole) -> str:
-    """Create a JWT token for testing with role claim."""
-    return create_access_token(data={"sub": user_id, "role": role.value})
-
-
 # --- User Fixtures ---
 
+ROLE_USER_IDS = {
+    UserRole.ADMIN: UUID("00000000-0000-0000-0000-000000000001"),
+    UserRole.MANAGER: UUID("00000000-0000-0000-0000-000000000002"),
+    UserRole.AUDITOR: UUID("00000000-0000-0000-0000-000000000003"),
+    UserRole.OPERATOR: UUID("00000000-0000-0000-0000-000000000004"),
+    UserRole.VIEWER: UUID("00000000-0000-0000-0000-000000000005"),
+}
 
-@pytest_asyncio.fixture
-async def admin_user(db_session: AsyncSession) -> User:
-    """Create an ADMIN test user."""
-    user_id = UUID("00000000-0000-0000-0000-000000000001")
-    auth_user = AuthUser(id=user_id, email="admin@flowviz.test")
-    db_session.add(auth_user)
-    await db_session.flush()
-
-    user = User(
-        id=user_id,
-        email="admin@flowviz.test",
-        full_name="Admin User",
-        role=UserRole.ADMIN,
-    )
-    db_session.add(user)
-    await db_session.commit()
-    return user
-
-
-@pytest_asyncio.fixture
-async def manager_user(db_session: AsyncSession) -> User:
-    """Create a MANAGER test user."""
-    user_id = UUID("00000000-0000-0000-0000-000000000002")
-    auth_user = AuthUser(id=user_id, email="manager@flowviz.test")
-    db_session.add(auth_user)
-    await db_session.flush()
-
-    user = User(
-        id=user_id,
-        email="manager@flowviz.test",
-        full_name="Manager User",
-        role=UserRole.MANAGER,
-    )
-    db_session.add(user)
-    await db_session.commit()
-    return user
-
-
-@pytest_asyncio.fixture
-async def auditor_user(db_session: AsyncSession) -> User:
-    """Create an AUDITOR test user."""
-    user_id = UUID("00000000-0000-0000-0000-000000000003")
-    auth_user = AuthUser(id=user_id, email="auditor@flowviz.test")
-    db_session.add(auth_user)
-    await db_session.flush()
-
-    user = User(
-        id=user_id,
-        email="auditor@flowviz.test",
-        full_name="Auditor User",
-        role=UserRole.AUDITOR,
-    )
-    db_session.add(user)
-    await db_session.commit()
-    return user
-
-
-@pytest_asyncio.fixture
-async def operator_user(db_session: AsyncSession) -> User:
-    """Create an OPERATOR test user."""
-    user_id = UUID("00000000-0000-0000-0000-000000000004")
-    auth_user = AuthUser(id=user_id, email="operator@flowviz.test")
-    db_session.add(auth_user)
-    await db_session.flush()
-
-    user = User(
-        id=user_id,
-        email="operator@flowviz.test",
-        full_name="Operator User",
-        role=UserRole.OPERATOR,
-    )
-    db_session.add(user)
-    await db_session.commit()
-    return user
-
-
-@pytest_asyncio.fixture
-async def viewer_user(db_session: AsyncSession) -> User:
-    """Create a VIEWER test user."""
-    user_id = UUID("00000000-0000-0000-0000-000000000005")
-    auth_user = AuthUser(id=user_id, email="viewer@flowviz.test")
-    db_session.add(auth_user)
-    await db_session.flush()
-
-    user = User(
-        id=user_id,
-        email="viewer@flowviz.test",
-        full_name="Viewer User",
-        role=UserRole.VIEWER,
-    )
-    db_session.add(user)
-    await db_session.commit()
-    return user
+# Rows bulk-inserted by `role_users` (one INSERT per table for all roles).
+# Keys must match the AuthUser / User column names exactly.
+ROLE_AUTH_USERS = [
+    {"id": user_id, "email": f"{role.value.lower()}@flowviz.test"}
+    for role, user_id in ROLE_USER_IDS.items()
+]
+ROLE_USERS = [
+    {
+        "id": user_id,
+        "email": f"{role.value.lower()}@flowviz.test",
+        "full_name": f"{role.value.title()} User",
+        "role": role,
+    }
+    for role, user_id in ROLE_USER_IDS.items()
+]
+
+# Request bodies shared by every write in this file (built once at import)
+LOT_PAYLOAD = {"lot_code": "TEST-001", "lot_type": "RAW"}
+QC_PAYLOAD = {"lot_id": "00000000-0000-0000-0000-000000000001", "decision": "PASS"}
+
+
+@pytest_asyncio.fixture(scope="module")
+async def role_users(module_db_session: AsyncSession) -> dict[UserRole, User]:
+    """
+    Create one test user per role, keyed by role.
+
+    Module-scoped: the rows are inserted once into the module transaction
+    and rolled back with it; per-test SAVEPOINTs keep tests isolated.
+    """
+    await module_db_session.execute(insert(AuthUser), ROLE_AUTH_USERS)
+    users = (await module_db_session.scalars(insert(User).returning(User), ROLE_USERS)).all()
+    await module_db_session.commit()
+    return {user.role: user for user in users}
+
+
+@pytest.fixture(scope="session")
+def role_auth_headers() -> dict[UserRole, dict[str, str]]:
+    """Bearer headers with one signed JWT per role user, shared by the session."""
+    tokens = {
+        role: create_access_token(data={"sub": str(user_id), "role": role.value})
+        for role, user_id in ROLE_USER_IDS.items()
+    }
+    return {role: {"Authorization": f"Bearer {token}"} for role, token in tokens.items()}
+
+
+@pytest.fixture
+def user_for_role(request: pytest.FixtureRequest, role_users: dict[UserRole, User]) -> User:
+    """Test user for the role given via indirect parametrization."""
+    return role_users[request.param]
 
 
 # --- Authentication Tests (401) ---
-
-
-@pytest.mark.asyncio
-async def test_missing_auth_returns_401_on_lots(client: AsyncClient):
-    """Missing Authorization header should return 401 on /lots."""
-    response = await client.get("/api/lots")
-    assert response.status_code == 401
-
-
-@pytest.mark.asyncio
-async def test_missing_auth_returns_401_on_create_lot(client: AsyncClient):
-    """Missing Authorization header should return 401 on POST /lots."""
-    response = await client.post("/api/lots", json={"lot_code": "TEST-001", "lot_type": "RAW"})
+# Status-only checks: call the ASGI app directly rather than through httpx.
+
+
+@pytest.mark.parametrize(
+    ("method", "path", "body"),
+    [
+        ("GET", "/api/lots", None),
+        ("POST", "/api/lots", LOT_PAYLOAD),
+        ("POST", "/api/qc-decisions", QC_PAYLOAD),
+        ("GET", "/api/traceability/TEST-LOT-001", None),
+    ],
+    ids=["lots", "create_lot", "qc_decisions", "traceability"],
+)
+async def test_missing_auth_returns_401(asgi_call, method: str, path: str, body: dict | None):
+    """Missing Authorization header should return 401 on every protected endpoint."""
+    response = await asgi_call(method, path, json_body=body)
     assert response.status_code == 401
 
 
-@pytest.mark.asyncio
-async def test_missing_auth_returns_401_on_qc_decisions(client: AsyncClient):
-    """Missing Authorization header should return 401 on POST /qc-decisions."""
-    response = await client.post(
-        "/api/qc-decisions",
-        json={"lot_id": "00000000-0000-0000-0000-000000000001", "decision": "PASS"},
-    )
-    assert response.status_code == 401
-
-
-@pytest.mark.asyncio
-async def test_missing_auth_returns_401_on_traceability(client: AsyncClient):
-    """Missing Authorization header should return 401 on /traceability."""
-    response = await client.get("/api/traceability/TEST-LOT-001")
-    assert response.status_code == 401
-
-
-@pytest.mark.asyncio
-async def test_invalid_token_returns_401(client: AsyncClient):
+async def test_invalid_token_returns_401(asgi_call):
     """Invalid JWT token should return 401."""
-    response = await client.get(
+    response = await asgi_call(
+        "GET",
         "/api/lots",
         headers={"Authorization": "Bearer invalid.token.here"},
     )
     assert response.status_code == 401
 
 
-@pytest.mark.asyncio
-async def test_expired_token_returns_401(client: AsyncClient):
+async def test_expired_token_returns_401(asgi_call):
     """Malformed Bearer token should return 401."""
-    response = await client.get(
+    response = await asgi_call(
+        "GET",
         "/api/lots",
         headers={"Authorization": "Bearer "},
     )
@@ -177,309 +124,97 @@ async def test_expired_token_returns_401(client: AsyncClient):
 # --- Health Endpoint (No Auth Required) ---
 
 
-@pytest.mark.asyncio
 async def test_health_endpoint_no_auth_required(client: AsyncClient):
     """Health endpoint should not require authentication."""
     response = await client.get("/api/health")
     assert response.status_code == 200
 
 
-# --- VIEWER Role Tests (Most Restricted) ---
-
-
-@pytest.mark.asyncio
-async def test_viewer_cannot_create_lots(client: AsyncClient, viewer_user: User):
-    """VIEWER role should get 403 when attempting to create lots."""
-    token = create_test_token(str(viewer_user.id), UserRole.VIEWER)
-
-    response = await client.post(
-        "/api/lots",
-        headers={"Authorization": f"Bearer {token}"},
-        json={"lot_code": "TEST-001", "lot_type": "RAW"},
-    )
-
-    assert response.status_code == 403
-    assert "Requires one of" in response.json()["detail"]
-    assert "X-Required-Roles" in response.headers
-
-
-@pytest.mark.asyncio
-async def test_viewer_cannot_make_qc_decisions(client: AsyncClient, viewer_user: User):
-    """VIEWER role should get 403 when attempting to create QC decisions."""
-    token = create_test_token(str(viewer_user.id), UserRole.VIEWER)
-
-    response = await client.post(
-        "/api/qc-decisions",
-        headers={"Authorization": f"Bearer {token}"},
-        json={
-            "lot_id": "00000000-0000-0000-0000-000000000001",
-            "decision": "PASS",
-        },
-    )
-
-    assert response.status_code == 403
-
-
-@pytest.mark.asyncio
-async def test_viewer_can_list_lots(client: AsyncClient, viewer_user: User):
-    """VIEWER role should be able to list lots (read access)."""
-    token = create_test_token(str(viewer_user.id), UserRole.VIEWER)
-
-    response = await client.get(
-        "/api/lots",
-        headers={"Authorization": f"Bearer {token}"},
-    )
-
-    # 200 OK - empty list is fine, no 403
-    assert response.status_code == 200
-
-
-@pytest.mark.asyncio
-async def test_viewer_can_access_traceability(client: AsyncClient, viewer_user: User):
-    """VIEWER role should access traceability (compliance requirement)."""
-    token = create_test_token(str(viewer_user.id), UserRole.VIEWER)
-
-    response = await client.get(
-        "/api/traceability/TEST-LOT-001",
-        headers={"Authorization": f"Bearer {token}"},
-    )
-
-    # 404 (lot not found) is acceptable, but NOT 403 (forbidden)
-    assert response.status_code in (200, 404)
-
-
-# --- AUDITOR Role Tests ---
-
-
-@pytest.mark.asyncio
-async def test_auditor_cannot_create_lots(client: AsyncClient, auditor_user: User):
-    """AUDITOR role should get 403 when attempting to create lots."""
-    token = create_test_token(str(auditor_user.id), UserRole.AUDITOR)
-
-    response = await client.post(
-        "/api/lots",
-        headers={"Authorization": f"Bearer {token}"},
-        json={"lot_code": "TEST-001", "lot_type": "RAW"},
-    )
-
-    assert response.status_code == 403
-
-
-@pytest.mark.asyncio
-async def test_auditor_can_make_qc_decisions(client: AsyncClient, auditor_user: User):
-    """AUDITOR role should be able to make QC decisions."""
-    token = create_test_token(str(auditor_user.id), UserRole.AUDITOR)
-
-    response = await client.post(
-        "/api/qc-decisions",
-        headers={"Authorization": f"Bearer {token}"},
-        json={
-            "lot_id": "00000000-0000-0000-0000-000000000001",
-            "decision": "PASS",
-        },
-    )
-
-    # 201 or 422 (validation) - but NOT 403 (forbidden)
-    assert response.status_code in (201, 422)
-
-
-# --- OPERATOR Role Tests ---
-
-
-@pytest.mark.asyncio
-async def test_operator_can_create_lots(client: AsyncClient, operator_user: User):
-    """OPERATOR role should be able to create lots."""
-    token = create_test_token(str(operator_user.id), UserRole.OPERATOR)
-
-    response = await client.post(
-        "/api/lots",
-        headers={"Authorization": f"Bearer {token}"},
-        json={"lot_code": "TEST-001", "lot_type": "RAW"},
-    )
-
-    # 201 or 422 (validation) - but NOT 403 (forbidden)
-    assert response.status_code in (201, 422)
-
-
-@pytest.mark.asyncio
-async def test_operator_can_make_qc_decisions(client: AsyncClient, operator_user: User):
-    """OPERATOR role should be able to make QC decisions."""
-    token = create_test_token(str(operator_user.id), UserRole.OPERATOR)
-
-    response = await client.post(
-        "/api/qc-decisions",
-        headers={"Authorization": f"Bearer {token}"},
-        json={
-            "lot_id": "00000000-0000-0000-0000-000000000001",
-            "decision": "PASS",
-        },
-    )
-
-    # 201 or 422 (validation) - but NOT 403 (forbidden)
-    assert response.status_code in (201, 422)
-
-
-# --- MANAGER Role Tests ---
-
-
-@pytest.mark.asyncio
-async def test_manager_can_create_lots(client: AsyncClient, manager_user: User):
-    """MANAGER role should be able to create lots."""
-    token = create_test_token(str(manager_user.id), UserRole.MANAGER)
-
-    response = await client.post(
-        "/api/lots",
-        headers={"Authorization": f"Bearer {token}"},
-        json={"lot_code": "TEST-002", "lot_type": "RAW"},
-    )
-
-    # 201 or 422 (validation) - but NOT 403 (forbidden)
-    assert response.status_code in (201, 422)
-
-
-@pytest.mark.asyncio
-async def test_manager_can_make_qc_decisions(client: AsyncClient, manager_user: User):
-    """MANAGER role should be able to make QC decisions."""
-    token = create_test_token(str(manager_user.id), UserRole.MANAGER)
-
-    response = await client.post(
-        "/api/qc-decisions",
-        headers={"Authorization": f"Bearer {token}"},
-        json={
-            "lot_id": "00000000-0000-0000-0000-000000000001",
-            "decision": "PASS",
-        },
-    )
-
-    # 201 or 422 (validation) - but NOT 403 (forbidden)
-    assert response.status_code in (201, 422)
-
-
-# --- ADMIN Role Tests ---
-
-
-@pytest.mark.asyncio
-async def test_admin_can_create_lots(client: AsyncClient, admin_user: User):
-    """ADMIN role should be able to create lots."""
-    token = create_test_token(str(admin_user.id), UserRole.ADMIN)
-
-    response = await client.post(
-        "/api/lots",
-        headers={"Authorization": f"Bearer {token}"},
-        json={"lot_code": "TEST-003", "lot_type": "RAW"},
-    )
-
-    # 201 or 422 (validation) - but NOT 403 (forbidden)
-    assert response.status_code in (201, 422)
-
-
-@pytest.mark.asyncio
-async def test_admin_can_make_qc_decisions(client: AsyncClient, admin_user: User):
-    """ADMIN role should be able to make QC decisions."""
-    token = create_test_token(str(admin_user.id), UserRole.ADMIN)
-
-    response = await client.post(
-        "/api/qc-decisions",
-        headers={"Authorization": f"Bearer {token}"},
-        json={
-            "lot_id": "00000000-0000-0000-0000-000000000001",
-            "decision": "PASS",
-        },
-    )
-
-    # 201 or 422 (validation) - but NOT 403 (forbidden)
-    assert response.status_code in (201, 422)
-
-
-# --- Parametrized Tests for All Roles ---
-
-
-ROLE_UUID_SUFFIX = {
-    UserRole.ADMIN: "a",
-    UserRole.MANAGER: "b",
-    UserRole.AUDITOR: "c",
-    UserRole.OPERATOR: "d",
-    UserRole.VIEWER: "e",
+# --- Role Permission Matrix ---
+# (role, method, path, accepted statuses). 403 only where the role guard must
+# reject; LOT_PAYLOAD and QC_PAYLOAD are valid, so permitted writes return 201.
+
+RBAC_CASES = [
+    # GET /lots: AllAuthenticated
+    (UserRole.ADMIN, "GET", "/api/lots", (200,)),
+    (UserRole.MANAGER, "GET", "/api/lots", (200,)),
+    (UserRole.AUDITOR, "GET", "/api/lots", (200,)),
+    (UserRole.OPERATOR, "GET", "/api/lots", (200,)),
+    (UserRole.VIEWER, "GET", "/api/lots", (200,)),
+    # POST /lots: CanCreateLots
+    (UserRole.ADMIN, "POST", "/api/lots", (201,)),
+    (UserRole.MANAGER, "POST", "/api/lots", (201,)),
+    (UserRole.AUDITOR, "POST", "/api/lots", (403,)),
+    (UserRole.OPERATOR, "POST", "/api/lots", (201,)),
+    (UserRole.VIEWER, "POST", "/api/lots", (403,)),
+    # POST /qc-decisions: CanMakeQCDecisions
+    (UserRole.ADMIN, "POST", "/api/qc-decisions", (201,)),
+    (UserRole.MANAGER, "POST", "/api/qc-decisions", (201,)),
+    (UserRole.AUDITOR, "POST", "/api/qc-decisions", (201,)),
+    (UserRole.OPERATOR, "POST", "/api/qc-decisions", (201,)),
+    (UserRole.VIEWER, "POST", "/api/qc-decisions", (403,)),
+    # GET /traceability: AllAuthenticated (compliance requirement); 404 = lot not found
+    (UserRole.ADMIN, "GET", "/api/traceability/TEST-LOT-001", (200, 404)),
+    (UserRole.MANAGER, "GET", "/api/traceability/TEST-LOT-001", (200, 404)),
+    (UserRole.AUDITOR, "GET", "/api/traceability/TEST-LOT-001", (200, 404)),
+    (UserRole.OPERATOR, "GET", "/api/traceability/TEST-LOT-001", (200, 404)),
+    (UserRole.VIEWER, "GET", "/api/traceability/TEST-LOT-001", (200, 404)),
+]
+
+REQUEST_BODIES = {
+    "/api/lots": LOT_PAYLOAD,
+    "/api/qc-decisions": QC_PAYLOAD,
 }
 
 
-@pytest.mark.asyncio
-@pytest.mark.parametrize("role", [UserRole.ADMIN, UserRole.MANAGER, UserRole.AUDITOR, UserRole.OPERATOR, UserRole.VIEWER])
-async def test_all_roles_can_list_lots(client: AsyncClient, db_session: AsyncSession, role: UserRole):
-    """All authenticated roles should be able to list lots."""
-    suffix = ROLE_UUID_SUFFIX[role]
-    user_id = UUID(f"00000000-0000-0000-0000-00000000001{suffix}")
-    auth_user = AuthUser(id=user_id, email=f"{role.value.lower()}-param@flowviz.test")
-    db_session.add(auth_user)
-    await db_session.flush()
-
-    user = User(
-        id=user_id,
-        email=f"{role.value.lower()}-param@flowviz.test",
-        full_name=f"{role.value} Param User",
-        role=role,
-    )
-    db_session.add(user)
-    await db_session.commit()
+@pytest.mark.parametrize(
+    ("user_for_role", "method", "path", "expected_statuses"),
+    RBAC_CASES,
+    indirect=["user_for_role"],
+    ids=[f"{role.value}-{method}-{path}" for role, method, path, _ in RBAC_CASES],
+)
+async def test_role_permission_matrix(
+    client: AsyncClient,
+    user_for_role: User,
+    role_auth_headers: dict[UserRole, dict[str, str]],
+    method: str,
+    path: str,
+    expected_statuses: tuple[int, ...],
+):
+    """Each role gets exactly the access its guard on the endpoint allows."""
+    response = await client.request(
+        method,
+        path,
+        headers=role_auth_headers[user_for_role.role],
+        json=REQUEST_BODIES.get(path),
+    )
+
+    assert response.status_code in expected_statuses
+    if response.status_code == 403:
+        # The guard's detail and header must survive the exception handlers
+        assert "Requires one of" in response.json()["detail"]
+        assert "X-Required-Roles" in response.headers
 
-    token = create_test_token(str(user.id), role)
 
-    response = await client.get(
-        "/api/lots",
-        headers={"Authorization": f"Bearer {token}"},
-    )
-
-    # 200 OK - no 403 (forbidden)
-    assert response.status_code == 200
-
-
-@pytest.mark.asyncio
-@pytest.mark.parametrize("role", [UserRole.ADMIN, UserRole.MANAGER, UserRole.AUDITOR, UserRole.OPERATOR, UserRole.VIEWER])
-async def test_all_roles_can_access_traceability(client: AsyncClient, db_session: AsyncSession, role: UserRole):
-    """All authenticated roles should access traceability (compliance requirement)."""
-    suffix = ROLE_UUID_SUFFIX[role]
-    user_id = UUID(f"00000000-0000-0000-0000-00000000002{suffix}")
-    auth_user = AuthUser(id=user_id, email=f"{role.value.lower()}-trace@flowviz.test")
-    db_session.add(auth_user)
-    await db_session.flush()
-
-    user = User(
-        id=user_id,
-        email=f"{role.value.lower()}-trace@flowviz.test",
-        full_name=f"{role.value} Trace User",
-        role=role,
-    )
-    db_session.add(user)
-    await db_session.commit()
-
-    token = create_test_token(str(user.id), role)
-
-    response = await client.get(
-        "/api/traceability/TEST-LOT-001",
-        headers={"Authorization": f"Bearer {token}"},
-    )
+# --- X-Required-Roles Header Tests ---
 
-    # 200 or 404 (not found) - but NOT 403 (forbidden)
-    assert response.status_code in (200, 404)
 
+# The matrix above checks that the 403 detail and header reach the client;
+# the listed roles are guard logic, so call CanCreateLots directly.
 
-# --- X-Required-Roles Header Tests ---
 
-
-@pytest.mark.asyncio
-async def test_403_response_includes_required_roles_header(client: AsyncClient, viewer_user: User):
+async def test_403_response_includes_required_roles_header():
     """403 responses should include X-Required-Roles header."""
-    token = create_test_token(str(viewer_user.id), UserRole.VIEWER)
+    can_create_lots = get_args(CanCreateLots)[1].dependency
+    viewer = User(id=ROLE_USER_IDS[UserRole.VIEWER], role=UserRole.VIEWER)
 
-    response = await client.post(
-        "/api/lots",
-        headers={"Authorization": f"Bearer {token}"},
-        json={"lot_code": "TEST-001", "lot_type": "RAW"},
-    )
+    with pytest.raises(HTTPException) as exc_info:
+        await can_create_lots(user=viewer)
 
-    assert response.status_code == 403
-    assert "X-Required-Roles" in response.headers
-    required_roles = response.headers["X-Required-Roles"]
+    assert exc_info.value.status_code == 403
+    assert "Requires one of" in exc_info.value.detail
+    assert "X-Required-Roles" in exc_info.value.headers
+    required_roles = exc_info.value.headers["X-Required-Roles"]
     # Should list ADMIN, MANAGER, OPERATOR (CanCreateLots)
     assert "ADMIN" in required_roles
     assert "MANAGER" in required_roles